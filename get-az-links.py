@@ -1,5 +1,6 @@
 """
-This script scrapes links from a library website using Playwright.
+This script scrapes links from a library website, using a plain HTTP request
+where possible and falling back to Playwright for pages that need JavaScript.
 It performs asynchronous web scraping and saves the collected links to a CSV file.
 The script is designed to work with GitHub Actions but can run independently.
 """
@@ -7,51 +8,275 @@ The script is designed to work with GitHub Actions but can run independently.
 # Import required libraries
 import csv
 import asyncio
+import html as html_lib
+import json
 import os
+import re
+import aiohttp
+import lxml.etree
+import lxml.html
 from playwright.async_api import async_playwright
+from collections import defaultdict
 from datetime import datetime
+from urllib.parse import quote
+
+try:
+    # Use the libuv-based event loop when it is installed
+    import uvloop
+except ImportError:
+    uvloop = None
 
 # Define the target URL for scraping
 base_url = os.environ['BASE_URL'] # "https://library.soton.ac.uk/az.php?"
 if not base_url:
         base_url = "https://library.soton.ac.uk/az.php?"
 
-async def get_links_with_playwright(url):
+# File GitHub Actions reads step environment variables from
+GITHUB_ENV_FILE = os.environ.get('GITHUB_ENV', 'env.txt')
+
+# Optional letters to scrape as separate A-Z pages (e.g. "abcdefghijklmnopqrstuvwxyz#").
+# When unset, only base_url is scraped.
+az_letters = os.environ.get('AZ_LETTERS', '')
+
+# Optional JSON file remembering each page's ETag/Last-Modified and links, so
+# unchanged pages can be answered with a 304 instead of being downloaded again
+az_cache_file = os.environ.get('AZ_CACHE_FILE', '')
+
+# Precompiled XPath for links inside the A-Z results, returning plain strings
+AZ_HREF_XPATH = lxml.etree.XPath(
+    "//*[contains(concat(' ', normalize-space(@class), ' '), ' s-lg-az-result ')]//a/@href",
+    smart_strings=False,
+)
+
+# Regexes for the A-Z results markup, used to pull links out without building
+# a document tree once they have been checked against lxml on this run
+AZ_RESULT_START_RE = re.compile(r'<div\b[^>]*\bclass=["\'](?:[^"\']*\s)?s-lg-az-result(?:\s[^"\']*)?["\']', re.IGNORECASE)
+DIV_TAG_RE = re.compile(r'<(/?)div\b', re.IGNORECASE)
+HREF_RE = re.compile(r'<a\b[^>]*?\shref\s*=\s*(?:"([^"]*)"|\'([^\']*)\')', re.IGNORECASE)
+
+# Links with these prefixes aren't web pages and are never collected
+IGNORED_PREFIXES = ('mailto:', '#', 'javascript:', 'tel:')
+
+# Number of A-Z pages fetched or loaded in the browser at once
+MAX_CONCURRENT_PAGES = 4
+
+# Chromium flags for running headless on CI runners
+BROWSER_ARGS = ['--no-sandbox', '--disable-dev-shm-usage', '--disable-gpu']
+
+# Desktop browser User-Agent for plain HTTP fetches of the A-Z pages
+USER_AGENT = 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/124.0 Safari/537.36'
+
+# Resource types that play no part in finding links, so are never downloaded
+BLOCKED_RESOURCE_TYPES = {'image', 'stylesheet', 'font', 'media'}
+
+async def block_unneeded_resources(route):
+    """
+    Playwright route handler that aborts requests for BLOCKED_RESOURCE_TYPES.
+    """
+    if route.request.resource_type in BLOCKED_RESOURCE_TYPES:
+        await route.abort()
+    else:
+        await route.continue_()
+
+def clean_az_links(hrefs):
+    """
+    Returns the set of collectable links from the raw href values.
+    """
+    links = set()
+    for href in hrefs:
+        href = href.strip()
+        # Filter out invalid or unwanted link types
+        if not href or href.startswith(IGNORED_PREFIXES):
+            continue
+        # Convert protocol-relative URLs to absolute URLs
+        if href[:2] == '//':
+            href = 'https:' + href
+        links.add(href)
+    return links
+
+def parse_az_links(html):
+    """
+    Returns the set of links inside the A-Z results, using a full lxml parse.
+    """
+    # Extract all links from the results with a single lxml XPath query
+    tree = lxml.html.fromstring(html)
+    return clean_az_links(AZ_HREF_XPATH(tree))
+
+def scan_az_links(html):
+    """
+    Returns the set of links inside the A-Z results by scanning the markup
+    with regexes: each result <div> is found, matched to its closing tag by
+    counting nested divs, and the hrefs inside it are collected.
+    """
+    hrefs = []
+    pos = 0
+    while match := AZ_RESULT_START_RE.search(html, pos):
+        depth = 0
+        end = len(html)
+        for tag in DIV_TAG_RE.finditer(html, match.start()):
+            depth += -1 if tag.group(1) else 1
+            if depth == 0:
+                end = tag.start()
+                break
+        hrefs.extend(html_lib.unescape(a.group(1) or a.group(2) or '')
+                     for a in HREF_RE.finditer(html, match.end(), end))
+        pos = end
+    return clean_az_links(hrefs)
+
+def make_az_extractor():
+    """
+    Returns a function that extracts the set of links inside the A-Z results
+    of a page's HTML, for use during one run. The first page with results is
+    parsed both ways; if the regex scan finds exactly the same links it is
+    used for later pages, otherwise (e.g. after a markup change) every page
+    gets the full lxml parse. Any page where the scan finds nothing is
+    parsed again with lxml, so a partial markup change can't lose a letter.
+    """
+    # None until checked, then whether the scan can be used for later pages
+    scan_ok = None
+
+    def extract_az_links(html):
+        nonlocal scan_ok
+        if scan_ok:
+            links = scan_az_links(html)
+            if links:
+                return links
+            return parse_az_links(html)
+        links = parse_az_links(html)
+        if scan_ok is None and links:
+            scan_ok = scan_az_links(html) == links
+        return links
+
+    return extract_az_links
+
+def load_page_cache():
     """
-    Asynchronously scrapes links from the specified URL using Playwright.
+    Returns the page cache from AZ_CACHE_FILE, or an empty dict.
+    """
+    if not az_cache_file or not os.path.exists(az_cache_file):
+        return {}
+    with open(az_cache_file, encoding='utf-8') as f:
+        return json.load(f)
+
+def save_page_cache(page_cache):
+    """
+    Writes the page cache back to AZ_CACHE_FILE, if one is configured.
+    """
+    if az_cache_file:
+        with open(az_cache_file, 'w', encoding='utf-8') as f:
+            json.dump(page_cache, f)
+
+async def get_links_with_aiohttp(session, url, page_cache, extract_az_links):
+    """
+    Fetches the specified URL with a plain HTTP request, as the A-Z list is
+    normally rendered on the server, and extracts its links with
+    extract_az_links. If the page is in page_cache, the request is
+    conditional and a 304 reuses the cached links.
+    Returns a set of unique links found on the page, or None if the results
+    aren't in the served HTML (or the request failed).
+    """
+    cached = page_cache.get(url)
+    headers = {}
+    if cached and cached.get('etag'):
+        headers['If-None-Match'] = cached['etag']
+    if cached and cached.get('last_modified'):
+        headers['If-Modified-Since'] = cached['last_modified']
+
+    try:
+        async with session.get(url, headers=headers) as response:
+            if response.status == 304 and cached:
+                print(f"{url} not modified, reusing cached links")
+                return set(cached['links'])
+            response.raise_for_status()
+            html = await response.text()
+            validators = response.headers.get('ETag'), response.headers.get('Last-Modified')
+        links = extract_az_links(html)
+    except Exception as e:
+        print(f"Error fetching {url} without a browser: {str(e)}")
+        return None
+
+    if not links:
+        return None
+    if any(validators):
+        page_cache[url] = {'etag': validators[0], 'last_modified': validators[1], 'links': sorted(links)}
+    print(f"Found {len(links)} links on {url}")
+    return links
+
+async def get_links_with_playwright(browser, url, extract_az_links):
+    """
+    Asynchronously scrapes links from the specified URL using Playwright,
+    extracting them from the rendered page with extract_az_links.
+    Uses a fresh context on the shared browser, closed again afterwards.
     Returns a set of unique links found on the page.
     """
     links = set()
+    context = await browser.new_context()
+    try:
+        # Skip images, styles, fonts and media, which only slow the page down
+        await context.route('**/*', block_unneeded_resources)
+
+        # Create a new page and navigate to the URL. Only the DOM is needed,
+        # as waiting for the results below is what guarantees the links exist.
+        page = await context.new_page()
+        await page.goto(url, wait_until='domcontentloaded')
+        
+        # Wait for the results container to load
+        await page.wait_for_selector('.s-lg-az-result', timeout=30000)
+        
+        links = extract_az_links(await page.content())
+        
+    except Exception as e:
+        print(f"Error getting links from {url}: {str(e)}")
+    finally:
+        # Ensure the context is closed even if an error occurs
+        await context.close()
+    
+    print(f"Found {len(links)} links on {url}")
+    return links
+
+async def scrape_az_pages(urls):
+    """
+    Scrapes all A-Z pages, fetching them concurrently over plain HTTP first.
+    Pages whose results need JavaScript are then loaded with one Chromium
+    instance, opening at most MAX_CONCURRENT_PAGES browser contexts at a time.
+    Returns a list of link sets in the same order as urls.
+    """
+    page_cache = load_page_cache()
+    extract_az_links = make_az_extractor()
+    timeout = aiohttp.ClientTimeout(total=30)
+    # All pages are on one host, so cap connections to it like the browser pages
+    connector = aiohttp.TCPConnector(limit_per_host=MAX_CONCURRENT_PAGES)
+    async with aiohttp.ClientSession(headers={'User-Agent': USER_AGENT}, timeout=timeout, connector=connector) as session:
+        pages = await asyncio.gather(*(get_links_with_aiohttp(session, url, page_cache, extract_az_links) for url in urls))
+    save_page_cache(page_cache)
+
+    browser_urls = [url for url, links in zip(urls, pages) if links is None]
+    if not browser_urls:
+        return pages
+
+    semaphore = asyncio.Semaphore(MAX_CONCURRENT_PAGES)
     async with async_playwright() as p:
-        # Launch a Chromium browser instance
-        browser = await p.chromium.launch()
+        # Launch a single Chromium browser instance for every remaining page
+        browser = await p.chromium.launch(args=BROWSER_ARGS)
         try:
-            # Create a new page and navigate to the URL
-            page = await browser.new_page()
-            await page.goto(url, wait_until='networkidle')
-            
-            # Wait for the results container to load
-            await page.wait_for_selector('.s-lg-az-result', timeout=30000)
-            
-            # Extract all links from the results
-            elements = await page.query_selector_all('.s-lg-az-result a')
-            for element in elements:
-                href = await element.get_attribute('href')
-                # Filter out invalid or unwanted link types
-                if href and not href.startswith(('mailto:', '#', 'javascript:', 'tel:')):
-                    # Convert protocol-relative URLs to absolute URLs
-                    if href.startswith('//'):
-                        href = 'https:' + href
-                    links.add(href)
-            
-        except Exception as e:
-            print(f"Error getting links from {url}: {str(e)}")
+            async def scrape(url):
+                async with semaphore:
+                    return await get_links_with_playwright(browser, url, extract_az_links)
+
+            browser_pages = iter(await asyncio.gather(*(scrape(url) for url in browser_urls)))
         finally:
             # Ensure browser is closed even if an error occurs
             await browser.close()
-    
-    print(f"Found {len(links)} links on {url}")
-    return links
+
+    return [links if links is not None else next(browser_pages) for links in pages]
+
+def get_az_urls():
+    """
+    Returns the A-Z pages to scrape: one per letter in AZ_LETTERS, or just base_url.
+    """
+    if not az_letters:
+        return [base_url]
+    return [f"{base_url}a={quote(letter)}" for letter in az_letters]
 
 async def main():
     """
@@ -59,8 +284,16 @@ async def main():
     """
     print(f"Starting link collection for {base_url}")
     
-    # Collect links using Playwright
-    links = await get_links_with_playwright(base_url)
+    # Collect links from every A-Z page concurrently
+    urls = get_az_urls()
+    pages = await scrape_az_pages(urls)
+
+    # Many links are listed under more than one letter, so group each link's
+    # pages together to keep its rows next to each other in the CSV
+    url_to_parents = defaultdict(list)
+    for url, links in zip(urls, pages):
+        for link in links:
+            url_to_parents[link].append(url)
 
     # Create reports directory if it doesn't exist
     os.makedirs('reports', exist_ok=True)
@@ -73,16 +306,19 @@ async def main():
     with open(links_file, 'w', newline='', encoding='utf-8') as csvfile:
         writer = csv.writer(csvfile)
         writer.writerow(['URL', 'Parent URL'])
-        for link in links:
-            writer.writerow([link, base_url])
+        # Pair each link with every A-Z page it was found on
+        writer.writerows((link, url) for link, parents in url_to_parents.items() for url in parents)
 
     # Set environment variable for GitHub Actions
     print(f"LINKS_FILE={links_file}")
-    with open(os.environ.get('GITHUB_ENV', 'env.txt'), 'a') as env_file:
+    with open(GITHUB_ENV_FILE, 'a') as env_file:
         env_file.write(f"LINKS_FILE={links_file}\n")
 
     print(f"Links saved to {links_file}")
 
 # Entry point of the script
 if __name__ == "__main__":
-    asyncio.run(main())
+    if uvloop:
+        uvloop.run(main())
+    else:
+        asyncio.run(main())
@@ -8,81 +8,237 @@ import asyncio
 import csv
 import os
 import argparse
-from urllib.parse import urljoin, urlparse
+import re
+from urllib.parse import urljoin, urlparse, urlunparse
+import lxml.etree
+import lxml.html
 from playwright.async_api import async_playwright
 from datetime import datetime
 
+try:
+    # Use the libuv-based event loop when it is installed
+    import uvloop
+except ImportError:
+    uvloop = None
+
+# Precompiled XPath returning plain strings, so collected links don't keep
+# the parsed document alive
+HREF_XPATH = lxml.etree.XPath('//a/@href', smart_strings=False)
+
+# Upper bound on the amount of rendered HTML parsed per page (about 2 MB)
+MAX_HTML_CHARS = 2 * 1024 * 1024
+
+# Links with these prefixes aren't web pages and are never collected
+IGNORED_PREFIXES = ('mailto:', '#', 'javascript:', 'tel:')
+ABSOLUTE_PREFIXES = ('http://', 'https://')
+
+# LibGuides asset links ("ld.php?content_id=") are never collected or crawled
+SKIP_URL_MARKER = "ld.php?content_id="
+
+# Number of (link, parent) rows handed to the CSV writer at a time
+WRITE_BATCH_SIZE = 4096
+
+# Host part of an absolute http(s) URL, cheaper than a full urlparse per link
+HOST_RE = re.compile(r'^https?://([^/?#]+)', re.IGNORECASE)
+
+# Links to these file types are still reported but never opened in the browser,
+# as they have no links to crawl and would only be downloaded
+NON_HTML_EXTENSIONS = ('.pdf', '.zip', '.doc', '.docx', '.xls', '.xlsx', '.ppt', '.pptx',
+                       '.png', '.jpg', '.jpeg', '.gif', '.svg', '.ico', '.mp3', '.mp4', '.csv')
+
+def is_crawlable(url):
+    """
+    Returns False for URLs whose path ends in a known non-HTML file extension.
+    """
+    path = url.split('#', 1)[0].split('?', 1)[0]
+    return not path.lower().endswith(NON_HTML_EXTENSIONS)
+
+def url_host(url):
+    """
+    Returns the lower-cased host (netloc) of an absolute http(s) URL, or '' for anything else.
+    """
+    match = HOST_RE.match(url)
+    return match.group(1).lower() if match else ''
+
+def canonical_url(url):
+    """
+    Returns a normalised form of the URL for de-duplication: lower-case scheme
+    and host, no fragment, an explicit root path and sorted query parameters.
+    """
+    parsed = urlparse(url)
+    query = '&'.join(sorted(parsed.query.split('&'))) if parsed.query else ''
+    return urlunparse((parsed.scheme.lower(), parsed.netloc.lower(), parsed.path or '/',
+                       parsed.params, query, ''))
+
+# File GitHub Actions reads step environment variables from
+GITHUB_ENV_FILE = os.environ.get('GITHUB_ENV', 'env.txt')
+
+# Optional Chromium profile directory kept between runs (e.g. with actions/cache),
+# so the browser's HTTP cache and cookies survive from one crawl to the next
+PROFILE_DIR = os.environ.get('PLAYWRIGHT_PROFILE_DIR', '')
+
+# Resource types that play no part in finding links, so are never downloaded
+BLOCKED_RESOURCE_TYPES = {'image', 'stylesheet', 'font', 'media'}
+
+async def block_unneeded_resources(route):
+    """
+    Playwright route handler that aborts requests for BLOCKED_RESOURCE_TYPES.
+    """
+    if route.request.resource_type in BLOCKED_RESOURCE_TYPES:
+        await route.abort()
+    else:
+        await route.continue_()
+
+def extract_links(html, url):
+    """
+    Parses page HTML and returns a dict mapping each unique link's canonical
+    form to the URL as first found on the page.
+    """
+    links = {}
+    # Parse the rendered HTML once with lxml and pull every <a href> in a
+    # single XPath call. Oversized pages are truncated so they can't stall the crawl.
+    tree = lxml.html.fromstring(html[:MAX_HTML_CHARS])
+    for href in HREF_XPATH(tree):
+        href = href.strip()
+        # Filter out links with IGNORED_PREFIXES, and reject skipped URLs on the
+        # raw href before paying for urljoin
+        if not href or href.startswith(IGNORED_PREFIXES) or SKIP_URL_MARKER in href:
+            continue
+        # Convert the relative URL to an absolute URL, keeping one entry per canonical URL.
+        # Absolute links are common and need no joining.
+        absolute_url = href if href.startswith(ABSOLUTE_PREFIXES) else urljoin(url, href)
+        links.setdefault(canonical_url(absolute_url), absolute_url)
+    return links
+
 async def get_links(page, url):
     """
     Asynchronously scrapes links from the specified URL using Playwright.
-    Returns a set of unique links found on the page.
+    Returns a dict mapping each unique link's canonical form to the URL as
+    first found on the page.
     """
-    links = set()
+    links = {}
     try:
         # Navigate to the URL and wait for the network to be idle
-        await page.goto(url, wait_until='networkidle')
-        # Find all <a> elements on the page
-        elements = await page.query_selector_all('a')
-        for element in elements:
-            # Get the 'href' attribute of each <a> element
-            href = await element.get_attribute('href')
-            # Filter out links that start with 'mailto:', '#', 'javascript:', or 'tel:'
-            if href and not href.startswith(('mailto:', '#', 'javascript:', 'tel:')):
-                # Convert the relative URL to an absolute URL
-                absolute_url = urljoin(url, href)
-                # Skip URLs that contain "ld.php?content_id="
-                if "ld.php?content_id=" not in absolute_url:
-                    links.add(absolute_url)
+        response = await page.goto(url, wait_until='networkidle')
+        # Skip anything that isn't an HTML page (PDFs, images, etc.) as there
+        # are no links to collect from it
+        if response and 'html' not in response.headers.get('content-type', ''):
+            return links
+        # Parse in a worker thread so other pages keep loading meanwhile;
+        # lxml releases the GIL while parsing
+        html = await page.content()
+        links = await asyncio.to_thread(extract_links, html, url)
     except Exception as e:
         print(f"Error getting links from {url}: {str(e)}")
     return links
 
-async def crawl_site(base_url, recurse=False, max_links=10000, max_depth=5):
+async def crawl_site(base_url, recurse=False, max_links=None, max_depth=5, workers=8):
     """
     Crawls the site starting from the base_url.
     If recurse is True, it will follow links within the same domain.
-    Limits the number of links to prevent memory issues.
+    Pages are fetched by a pool of workers, each with its own browser page,
+    pulling URLs from a shared queue.
+    If max_links is given, no new pages are visited once that many links
+    have been collected; by default the crawl is only bounded by max_depth.
+    If PLAYWRIGHT_PROFILE_DIR is set, the browser profile there is reused,
+    along with its HTTP cache.
     """
     async with async_playwright() as p:
-        browser = await p.chromium.launch()
-        page = await browser.new_page()
-        
-        visited = set()
-        to_visit = [(base_url, 0)]  # (url, depth)
-        all_links = []
-        base_domain = urlparse(base_url).netloc
-
-        while to_visit and len(all_links) < max_links:
-            url, depth = to_visit.pop(0)
-            
-            # Skip URLs that have already been visited, contain "ld.php?content_id=", or exceed the maximum depth
-            if url in visited or "ld.php?content_id=" in url or depth >= max_depth:
-                continue
-            
-            visited.add(url)
-            links = await get_links(page, url)
-            
-            for link in links:
-                all_links.append((link, url))
-                # If recursing, add new links to the to_visit list if they are within the same domain and haven't been visited
-                if recurse and urlparse(link).netloc == base_domain and link not in visited:
-                    to_visit.append((link, depth + 1))
-            
-            # Write links to file in batches to save memory
-            if len(all_links) >= 1000:
-                yield all_links
-                all_links = []
+        if PROFILE_DIR:
+            # A persistent context opens pages and closes like a browser
+            browser = await p.chromium.launch_persistent_context(PROFILE_DIR, headless=True)
+        else:
+            browser = await p.chromium.launch()
+
+        # Hashes of the canonical URLs that have been queued; each page is queued at
+        # most once, so the FIFO queue gives a plain breadth-first crawl. Storing the
+        # 64-bit string hash rather than the URL keeps this small on large crawls,
+        # and a collision (which would skip one page) is vanishingly unlikely.
+        seen = {hash(canonical_url(base_url))}
+        to_visit = asyncio.Queue()  # (url, depth)
+        found = asyncio.Queue()  # Lists of (link, parent_url) from each page
+        base_domain = url_host(base_url)
+        link_count = 0
 
-        # Yield any remaining links
-        if all_links:
-            yield all_links
+        to_visit.put_nowait((base_url, 0))
 
-        await browser.close()
+        async def open_page():
+            page = await browser.new_page()
+            # Skip images, styles, fonts and media, which only slow each page down.
+            # Playwright disables the HTTP cache on routed pages, so a persistent
+            # profile is left to serve them from its cache instead.
+            if not PROFILE_DIR:
+                await page.route('**/*', block_unneeded_resources)
+            return page
+
+        async def worker(page):
+            nonlocal link_count
+            try:
+                while True:
+                    url, depth = await to_visit.get()
+                    try:
+                        # Skip URLs that contain SKIP_URL_MARKER, exceed the maximum depth,
+                        # or arrive after any link limit has been reached
+                        if (SKIP_URL_MARKER in url or depth >= max_depth
+                                or (max_links is not None and link_count >= max_links)):
+                            continue
+
+                        links = await get_links(page, url)
+
+                        page_links = []
+                        for link_key, link in links.items():
+                            page_links.append((link, url))
+                            # If recursing, queue new links if they are within the same domain, look like
+                            # HTML pages, are within the maximum depth and haven't been queued before
+                            if (recurse and depth + 1 < max_depth and hash(link_key) not in seen
+                                    and url_host(link) == base_domain and is_crawlable(link)):
+                                seen.add(hash(link_key))
+                                to_visit.put_nowait((link, depth + 1))
+
+                        link_count += len(page_links)
+                        found.put_nowait(page_links)
+                    finally:
+                        to_visit.task_done()
+            finally:
+                await page.close()
+
+        async def finish():
+            # Signal the consumer once every queued URL has been processed
+            await to_visit.join()
+            found.put_nowait(None)
+
+        tasks = []
+        try:
+            # Open every worker's page before starting any of them, so a failure
+            # is raised here instead of leaving a dead worker and a queue that never drains
+            pages = [await open_page() for _ in range(workers)]
+            tasks = [asyncio.create_task(worker(page)) for page in pages]
+            tasks.append(asyncio.create_task(finish()))
+
+            all_links = []
+            while (page_links := await found.get()) is not None:
+                all_links.extend(page_links)
+
+                # Write links to file in batches to save memory
+                if len(all_links) >= WRITE_BATCH_SIZE:
+                    yield all_links
+                    all_links = []
+
+            # Yield any remaining links
+            if all_links:
+                yield all_links
+        finally:
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+            await browser.close()
 
 async def main():
     parser = argparse.ArgumentParser(description="Crawl a website and collect links.")
     parser.add_argument("--recurse", action="store_true", help="Recursively crawl the site")
     parser.add_argument("--max-depth", type=int, default=5, help="Maximum depth for recursive crawling")
+    parser.add_argument("--max-links", type=int, default=None, help="Stop visiting pages after collecting this many links (default: no limit)")
+    parser.add_argument("--workers", type=int, default=8, help="Number of pages crawled concurrently")
     parser.add_argument("--format", choices=["CSV"], default="CSV", help="Output format")
     args = parser.parse_args()
 
@@ -99,20 +255,24 @@ async def main():
 
 
     if args.format == "CSV":
-        with open(links_file, "w", newline="", encoding="utf-8") as csvfile:
+        with open(links_file, "w", newline="", encoding="utf-8", buffering=1 << 20) as csvfile:
             writer = csv.writer(csvfile)
             writer.writerow(["URL", "Parent URL"])
             
             # Crawl the site and write the collected links to the CSV file in batches
-            async for links_batch in crawl_site(base_url, args.recurse, max_depth=args.max_depth):
+            async for links_batch in crawl_site(base_url, args.recurse, max_links=args.max_links,
+                                                max_depth=args.max_depth, workers=args.workers):
                 writer.writerows(links_batch)
     
     # Set the LINKS_FILE environment variable for GitHub Actions
     print(f"LINKS_FILE={links_file}")
-    with open(os.environ.get('GITHUB_ENV', 'env.txt'), 'a') as env_file:
+    with open(GITHUB_ENV_FILE, 'a') as env_file:
         env_file.write(f"LINKS_FILE={links_file}\n")
-        
-        print(f"Links saved to get-links-{date}.csv")
+
+    print(f"Links saved to {links_file}")
 
 if __name__ == "__main__":
-    asyncio.run(main())
+    if uvloop:
+        uvloop.run(main())
+    else:
+        asyncio.run(main())
@@ -0,0 +1,609 @@
+"""
+Shared URL checking logic for check-urls.py and url-checker.py.
+Reads a CSV of (URL, Parent URL) rows, checks each URL asynchronously and
+writes a full report plus a 404-only report.
+"""
+
+import asyncio
+import aiohttp
+import csv
+import gzip
+import os
+import random
+import socket
+import sqlite3
+import ssl
+import time
+from collections import defaultdict
+from contextlib import asynccontextmanager
+from dataclasses import dataclass
+from datetime import datetime, timedelta, timezone
+from email.utils import parsedate_to_datetime
+from typing import AsyncIterator, Dict, Iterable, List, Optional, Tuple, Union
+from urllib.parse import SplitResult, urlsplit
+from aiohttp import ClientTimeout
+
+try:
+    # Use the libuv-based event loop when it is installed
+    import uvloop
+except ImportError:
+    uvloop = None
+
+try:
+    # aiodns lets aiohttp resolve many hosts at once instead of through a thread pool
+    import aiodns
+except ImportError:
+    aiodns = None
+
+# Files GitHub Actions reads step environment variables and outputs from
+GITHUB_ENV_FILE = os.environ.get('GITHUB_ENV', 'env.txt')
+GITHUB_OUTPUT_FILE = os.environ.get('GITHUB_OUTPUT', 'github_output.txt')
+
+# Statuses worth retrying, along with timeouts and dropped connections. DNS
+# errors, refused connections and other statuses won't change within a run,
+# so are reported straight away.
+RETRY_STATUSES = {408, 425, 429, 500, 502, 503, 504}
+
+# Longest wait between attempts, in seconds, even if Retry-After asks for more
+MAX_RETRY_DELAY = 30
+
+# Set GZIP_REPORTS to write the reports as gzip-compressed .csv.gz files,
+# which are much smaller to upload, commit and attach
+GZIP_REPORTS = bool(os.environ.get('GZIP_REPORTS'))
+
+# Checks that may be started but unfinished at once. Most are waiting on a
+# busy host's limit; this only bounds how far ahead the input is read.
+MAX_PENDING_CHECKS = 1000
+
+# Failed or timed-out connection attempts after which an endpoint (host, port) is
+# treated as unreachable for the rest of the run; one refused or reset connect may be transient
+DEAD_HOST_FAILURES = 3
+
+# Ports used when a URL doesn't give one
+DEFAULT_PORTS = {'http': 80, 'https': 443}
+
+# Statuses meaning a server is overloaded or rate limiting us
+OVERLOAD_STATUSES = (429, 503)
+
+# Bounds on the moving average of overloaded responses: above the upper one
+# the concurrency limit is halved, below the lower one it is doubled
+OVERLOAD_HIGH = 0.3
+OVERLOAD_LOW = 0.02
+
+@dataclass(slots=True)
+class CheckResult:
+    """
+    Outcome of checking the URL on one input row. status is the HTTP status
+    code, or an error message if no response was received.
+    """
+    url: str
+    status: Union[int, str]
+    content_type: Optional[str]
+    parent_url: str
+    line_number: int
+
+    def as_row(self) -> Tuple[str, Union[int, str], Optional[str], str, int]:
+        """
+        Return the fields in report column order
+        """
+        return self.url, self.status, self.content_type, self.parent_url, self.line_number
+
+def is_unknown_host(error: OSError) -> bool:
+    """
+    Return True if a DNS lookup answered that the host doesn't exist (NXDOMAIN),
+    as opposed to failing in a way that might succeed on a later attempt
+    """
+    if isinstance(error, socket.gaierror):
+        return error.errno == socket.EAI_NONAME
+    # AsyncResolver raises a plain OSError caused by the aiodns error
+    cause = error.__cause__
+    return (aiodns is not None and isinstance(cause, aiodns.error.DNSError)
+            and cause.args[0] == aiodns.error.ARES_ENOTFOUND)
+
+def open_report(path: str):
+    """
+    Open a report CSV for writing, gzip-compressed if GZIP_REPORTS is set
+    """
+    if GZIP_REPORTS:
+        return gzip.open(path, 'wt', newline='', encoding='utf-8')
+    return open(path, 'w', newline='', encoding='utf-8', buffering=1 << 20)
+
+def parse_retry_after(value: Optional[str]) -> Optional[float]:
+    """
+    Return the seconds to wait from a Retry-After header (a delay or an HTTP date), or None
+    """
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        return max(0.0, (parsedate_to_datetime(value) - datetime.now(timezone.utc)).total_seconds())
+    except (TypeError, ValueError):
+        return None
+
+class URLChecker:
+    def __init__(self, 
+                 max_retries: int = 3,
+                 timeout_seconds: int = 10,
+                 read_timeout_seconds: int = 5,
+                 max_concurrent: int = 50,
+                 min_concurrent: int = 5,
+                 max_per_host: int = 10,
+                 retry_delay: int = 1,
+                 cache_file: Optional[str] = None,
+                 cache_ttl: int = 86400,
+                 headers: Optional[Dict[str, str]] = None):
+        """
+        Initialize URL checker with configurable parameters for request handling.
+        If cache_file is given, URLs that returned 200 within cache_ttl seconds
+        (in this or an earlier run) are not requested again, and older ones are
+        revalidated with a conditional request where the server gave an ETag
+        or Last-Modified date.
+        A request fails after timeout_seconds in total, if a connection can't be
+        opened within 5 seconds, or as soon as the server sends nothing for
+        read_timeout_seconds, so a stalled server can't hold a request slot for
+        the whole budget. Time spent waiting for a free pooled connection only
+        counts toward the total.
+        headers replaces the default request headers, which identify the
+        GitHub Actions run in server logs.
+        The number of requests in flight starts at max_concurrent and adapts
+        between min_concurrent and max_concurrent to how often servers answer
+        429/503. Timeouts aren't counted, as one stalled host says nothing
+        about the load on the others.
+        """
+        self.max_retries = max_retries
+        self.timeout = ClientTimeout(total=timeout_seconds, sock_connect=5, sock_read=read_timeout_seconds)
+        self.max_concurrent = max_concurrent
+        self.retry_delay = retry_delay
+        self.max_per_host = max_per_host
+        self.min_concurrent = min_concurrent
+        # Global limit on requests in flight, resizable unlike a Semaphore
+        self.limit = max_concurrent
+        self.in_flight = 0
+        self.condition = asyncio.Condition()
+        self.overload_rate = 0.0  # Moving average of overloaded responses
+        # Per-host limits, taken before the global limit so requests queued
+        # behind a busy host don't hold global slots other hosts could use
+        self.host_semaphores: Dict[str, asyncio.Semaphore] = defaultdict(
+            lambda: asyncio.Semaphore(self.max_per_host)
+        )
+        self.session = None  # Shared ClientSession, opened by __aenter__
+        # Endpoints (host, port) that don't exist or repeatedly failed to accept a
+        # connection, mapped to the last error seen
+        self.dead_hosts: Dict[Tuple[str, Optional[int]], str] = {}
+        # Number of failed connection attempts to each endpoint
+        self.connect_failures: Dict[Tuple[str, Optional[int]], int] = defaultdict(int)
+        self.cache_file = cache_file
+        self.cache_ttl = cache_ttl
+        self.cache = None  # sqlite3 connection, opened by __aenter__
+        self.cache_writes = 0
+
+        # Get GitHub Actions context
+        run_id = os.environ.get('GITHUB_RUN_ID', 'unknown')
+        workflow_name = os.environ.get('GITHUB_WORKFLOW', 'unknown')
+        repository = os.environ.get('GITHUB_REPOSITORY', 'unknown')
+
+        # Set headers for requests to mimic browser and provide server log tracking
+        self.headers = headers or {
+            'User-Agent': f'GitHubActionAZLinkChecker/1.0 (Run:{run_id}; Workflow:{workflow_name}; Repo:{repository})',
+            'X-GitHub-Action-Run': run_id,
+            'X-Workflow-Source': workflow_name,
+            'X-GitHub-Repository': repository,
+            'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,image/webp,*/*;q=0.8',
+            'Accept-Language': 'en-US,en;q=0.5',
+            'Connection': 'keep-alive',
+            'Cache-Control': 'no-cache',
+            'Pragma': 'no-cache',
+        }
+
+    async def __aenter__(self) -> 'URLChecker':
+        """
+        Open one ClientSession for the whole run so keep-alive connections and
+        cached DNS lookups are reused across every batch
+        """
+        # Certificates aren't verified, as a broken certificate isn't a broken link.
+        # One context serves every connection, so TLS sessions can be reused.
+        ssl_context = ssl.create_default_context()
+        ssl_context.check_hostname = False
+        ssl_context.verify_mode = ssl.CERT_NONE
+        connector = aiohttp.TCPConnector(
+            ssl=ssl_context,
+            limit=self.max_concurrent,
+            limit_per_host=self.max_per_host,
+            ttl_dns_cache=600,
+            keepalive_timeout=30,
+            resolver=aiohttp.AsyncResolver() if aiodns else None
+        )
+        # Headers and timeout are session defaults, so requests only pass what differs
+        self.session = aiohttp.ClientSession(connector=connector, headers=self.headers, timeout=self.timeout)
+        if self.cache_file:
+            self.cache = sqlite3.connect(self.cache_file)
+            self.cache.execute(
+                'CREATE TABLE IF NOT EXISTS links (url TEXT PRIMARY KEY, status INTEGER, content_type TEXT, '
+                'checked INTEGER, etag TEXT, last_modified TEXT)'
+            )
+        return self
+
+    async def __aexit__(self, *exc_info) -> None:
+        await self.session.close()
+        self.session = None
+        if self.cache:
+            self.cache.commit()
+            self.cache.close()
+            self.cache = None
+
+    def get_cached(self, url: str) -> Optional[Tuple[int, str, int, Optional[str], Optional[str]]]:
+        """
+        Return (status, content_type, checked, etag, last_modified) for a URL that last returned 200, else None
+        """
+        if not self.cache:
+            return None
+        return self.cache.execute(
+            'SELECT status, content_type, checked, etag, last_modified FROM links WHERE url = ? AND status = 200',
+            (url,)
+        ).fetchone()
+
+    def set_cached(self, url: str, status: int, content_type: str,
+                   etag: Optional[str] = None, last_modified: Optional[str] = None) -> None:
+        """
+        Record a successful check, committing to disk every 100 writes
+        """
+        if not self.cache:
+            return
+        self.cache.execute(
+            'INSERT OR REPLACE INTO links VALUES (?, ?, ?, ?, ?, ?)',
+            (url, status, content_type, int(time.time()), etag, last_modified)
+        )
+        self.cache_writes += 1
+        if self.cache_writes % 100 == 0:
+            self.cache.commit()
+
+    @asynccontextmanager
+    async def request_slot(self):
+        """
+        Wait until fewer than self.limit requests are in flight and hold a slot
+        """
+        async with self.condition:
+            await self.condition.wait_for(lambda: self.in_flight < self.limit)
+            self.in_flight += 1
+        try:
+            yield
+        finally:
+            async with self.condition:
+                self.in_flight -= 1
+                self.condition.notify()
+
+    async def set_limit(self, limit: int) -> None:
+        """
+        Change the number of requests allowed in flight, waking waiters if it grew
+        """
+        async with self.condition:
+            print(f"Concurrency limit {self.limit} -> {limit}")
+            self.limit = limit
+            self.condition.notify_all()
+
+    async def record_outcome(self, overloaded: bool) -> None:
+        """
+        Update the moving average of overloaded responses, halving the limit
+        when it goes above OVERLOAD_HIGH and doubling it below OVERLOAD_LOW
+        """
+        self.overload_rate += 0.1 * (overloaded - self.overload_rate)
+        if self.overload_rate > OVERLOAD_HIGH and self.limit > self.min_concurrent:
+            limit = max(self.min_concurrent, self.limit // 2)
+        elif self.overload_rate < OVERLOAD_LOW and self.limit < self.max_concurrent:
+            limit = min(self.max_concurrent, self.limit * 2)
+        else:
+            return
+        # Start between the bounds again so the next change needs fresh evidence
+        self.overload_rate = (OVERLOAD_HIGH + OVERLOAD_LOW) / 2
+        await self.set_limit(limit)
+
+    def timeout_message(self, error: asyncio.TimeoutError) -> str:
+        """
+        Describe which of the timeouts in self.timeout a request ran into
+        """
+        if isinstance(error, aiohttp.ConnectionTimeoutError):
+            return f"Timeout: no connection within {self.timeout.sock_connect} seconds"
+        if isinstance(error, aiohttp.SocketTimeoutError):
+            return f"Timeout: no response within {self.timeout.sock_read} seconds"
+        return f"Timeout after {self.timeout.total} seconds"
+
+    async def fetch_status(self, session: aiohttp.ClientSession, url: str, headers: Optional[Dict[str, str]],
+                           cached: Optional[Tuple]) -> Tuple[int, str, Tuple[Optional[str], Optional[str]], Optional[float]]:
+        """
+        Request a URL's status once. headers are sent on top of the session's default headers.
+        Returns: Tuple of (status_code, content_type, (etag, last_modified), retry_after_seconds)
+        """
+        # Only the status line and headers are needed, so ask with HEAD first
+        async with session.head(
+            url,
+            allow_redirects=True,
+            headers=headers
+        ) as response:
+            status = response.status
+            content_type = response.headers.get('Content-Type', 'Unknown')
+            validators = response.headers.get('ETag'), response.headers.get('Last-Modified')
+            retry_after = response.headers.get('Retry-After')
+
+        # Not modified since it last returned 200, so it still works
+        if status == 304 and cached:
+            status, content_type = 200, cached[1]
+            validators = validators[0] or cached[3], validators[1] or cached[4]
+
+        # Some servers reject or mishandle HEAD (405, 501, or even 403/404), so
+        # confirm error statuses with a GET for a single byte. Rate limiting and
+        # overload statuses are left to the retry loop rather than doubling the
+        # requests. Leaving the response blocks releases the connection without
+        # reading a body.
+        if status >= 400 and status not in RETRY_STATUSES:
+            async with session.get(
+                url,
+                allow_redirects=True,
+                headers={'Range': 'bytes=0-0'}
+            ) as response:
+                # A 206 partial response means the full resource is available, and a
+                # 416 means the resource exists but is too short for the range (e.g. empty)
+                status = 200 if response.status in (206, 416) else response.status
+                content_type = response.headers.get('Content-Type', 'Unknown')
+                validators = response.headers.get('ETag'), response.headers.get('Last-Modified')
+                retry_after = response.headers.get('Retry-After')
+
+        return status, content_type, validators, parse_retry_after(retry_after)
+
+    async def check_single_url(self, session: aiohttp.ClientSession, url: str, parts: SplitResult, parent_url: str, line_number: int) -> CheckResult:
+        """
+        Check a single URL, making up to max_retries attempts while it times out,
+        drops the connection or answers with one of RETRY_STATUSES.
+        parts is the URL as already split by the caller.
+        """
+        # Fail fast for hosts that already could not be connected to in this run
+        host = parts.netloc
+        endpoint = parts.hostname, parts.port or DEFAULT_PORTS.get(parts.scheme)
+        if endpoint in self.dead_hosts:
+            return CheckResult(url, f"Connection error: {self.dead_hosts[endpoint]} (host unreachable earlier in run)", None, parent_url, line_number)
+        # Skip the request if the URL was recently found to be working, otherwise
+        # ask the server whether it has changed since it was last seen working
+        headers = None
+        cached = self.get_cached(url)
+        if cached:
+            status, content_type, checked, etag, last_modified = cached
+            if time.time() - checked < self.cache_ttl:
+                return CheckResult(url, status, content_type, parent_url, line_number)
+            # Cache-Control takes precedence over the default Pragma: no-cache
+            headers = {'Cache-Control': 'max-age=0'}
+            if etag:
+                headers['If-None-Match'] = etag
+            if last_modified:
+                headers['If-Modified-Since'] = last_modified
+        result = None
+        retry_after = None
+        # Always make at least one attempt, so there is a result to return
+        for attempt in range(max(1, self.max_retries)):
+            if attempt:
+                # Wait as long as the server asked, or back off exponentially, with jitter
+                delay = retry_after if retry_after is not None else self.retry_delay * 2 ** (attempt - 1)
+                await asyncio.sleep(min(delay, MAX_RETRY_DELAY) + random.uniform(0, 0.25))
+                retry_after = None
+            async with self.host_semaphores[host], self.request_slot():  # Control concurrent connections
+                # The host may have been given up on while this URL was waiting
+                if endpoint in self.dead_hosts:
+                    return CheckResult(url, f"Connection error: {self.dead_hosts[endpoint]} (host unreachable earlier in run)", None, parent_url, line_number)
+                try:
+                    status, content_type, validators, retry_after = await self.fetch_status(session, url, headers, cached)
+                except aiohttp.ConnectionTimeoutError as e:
+                    # No connection at all, e.g. a host that drops packets. The error doesn't
+                    # say which endpoint of any redirects it was trying, so it is counted
+                    # against this URL's own. Read timeouts mean the host is up, so aren't.
+                    result = CheckResult(url, self.timeout_message(e), None, parent_url, line_number)
+                    self.connect_failures[endpoint] += 1
+                    if self.connect_failures[endpoint] >= DEAD_HOST_FAILURES:
+                        self.dead_hosts[endpoint] = result.status
+                        break
+                    continue
+                except asyncio.TimeoutError as e:
+                    result = CheckResult(url, self.timeout_message(e), None, parent_url, line_number)
+                    continue
+                except aiohttp.ServerDisconnectedError as e:
+                    result = CheckResult(url, f"Connection error: {str(e)}", None, parent_url, line_number)
+                    continue
+                except aiohttp.ClientConnectorError as e:
+                    # Refused connection, DNS failure, etc. Once the host is known not to exist,
+                    # or has failed repeatedly, the rest of its URLs are failed straight away.
+                    # The failing connection may be to a redirect target, so it is recorded
+                    # against the endpoint in the error rather than this URL's host.
+                    failed = e.host, e.port
+                    self.connect_failures[failed] += 1
+                    if (self.connect_failures[failed] >= DEAD_HOST_FAILURES
+                            or isinstance(e, aiohttp.ClientConnectorDNSError) and is_unknown_host(e.os_error)):
+                        self.dead_hosts[failed] = str(e)
+                    return CheckResult(url, f"Connection error: {str(e)}", None, parent_url, line_number)
+                except aiohttp.ClientError as e:
+                    return CheckResult(url, f"Connection error: {str(e)}", None, parent_url, line_number)
+                except Exception as e:
+                    return CheckResult(url, f"Unexpected error: {str(e)}", None, parent_url, line_number)
+            await self.record_outcome(status in OVERLOAD_STATUSES)
+            result = CheckResult(url, status, content_type, parent_url, line_number)
+            if status not in RETRY_STATUSES:
+                break
+
+        if result.status == 200:
+            self.set_cached(url, 200, result.content_type, *validators)
+        return result
+
+    async def check_rows(self, rows: Iterable[Tuple[int, List[str]]]) -> AsyncIterator[List[CheckResult]]:
+        """
+        Check (line_number, [url, parent_url]) rows concurrently, yielding lists
+        of results as they complete: each list holds every result that finished
+        since the previous one, so they can be written in one call.
+        Each URL gets its own task, which waits for its host's limit before
+        taking a global request slot, so a long run of one host's URLs can't
+        idle the rest. Rows are read only MAX_PENDING_CHECKS ahead of the
+        finished checks, so the input never has to fit in memory.
+        Each URL is requested only once, however many rows it appears on.
+        """
+        results: asyncio.Queue = asyncio.Queue()
+        # URLs being checked, mapped to the (parent_url, line_number) of every row waiting on them
+        pending: Dict[str, List[Tuple[str, int]]] = {}
+        # URLs already checked, mapped to their (status, content_type)
+        checked: Dict[str, Tuple[Union[int, str], Optional[str]]] = {}
+        backlog = asyncio.Semaphore(MAX_PENDING_CHECKS)
+        checks = set()
+
+        async def check(url: str, parts: SplitResult, parent_url: str, line_number: int) -> None:
+            try:
+                result = await self.check_single_url(self.session, url, parts, parent_url, line_number)
+            except Exception as e:
+                # e.g. a cache error; report it like any other failure and carry on
+                result = CheckResult(url, f"Unexpected error: {str(e)}", None, parent_url, line_number)
+            finally:
+                backlog.release()
+            checked[url] = result.status, result.content_type
+            for parent_url, line_number in pending.pop(url):
+                results.put_nowait(CheckResult(url, result.status, result.content_type, parent_url, line_number))
+
+        async def produce() -> None:
+            try:
+                for line_number, row in rows:
+                    if not row:
+                        continue
+                    url = row[0]
+                    parent_url = row[1] if len(row) > 1 else "N/A"
+                    if url in checked:
+                        results.put_nowait(CheckResult(url, *checked[url], parent_url, line_number))
+                        continue
+                    if url in pending:
+                        pending[url].append((parent_url, line_number))
+                        continue
+                    # Split the URL once; its parts are reused for limits and dead_hosts
+                    try:
+                        parts = urlsplit(url)
+                        parts.port  # Raises ValueError for an invalid port
+                    except ValueError as e:
+                        # Malformed URL (e.g. "http://["): report it and carry on
+                        checked[url] = f"Unexpected error: {str(e)}", None
+                        results.put_nowait(CheckResult(url, *checked[url], parent_url, line_number))
+                        continue
+                    pending[url] = [(parent_url, line_number)]
+                    await backlog.acquire()
+                    task = asyncio.create_task(check(url, parts, parent_url, line_number))
+                    checks.add(task)
+                    task.add_done_callback(checks.discard)
+                await asyncio.gather(*checks)
+            finally:
+                # Always tell the consumer there are no more results, so it can't wait forever
+                results.put_nowait(None)
+
+        producer = asyncio.create_task(produce())
+        try:
+            finished = False
+            while not finished:
+                # Wait for one result, then take any others that are already waiting
+                done = [await results.get()]
+                while not results.empty():
+                    done.append(results.get_nowait())
+                finished = None in done
+                done = [result for result in done if result is not None]
+                if done:
+                    yield done
+            await producer  # Raise any error from reading the input
+        finally:
+            tasks = [producer, *checks]
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+
+async def main(links_prefix: str, report_prefix: str, headers: Optional[Dict[str, str]] = None):
+    """
+    Check the links in LINKS_FILE (default: reports/{links_prefix}-<date a week ago>.csv)
+    and write reports/{report_prefix}-report-<date>.csv and the matching 404 report
+    """
+    # Set up file paths and ensure directories exist
+    now = datetime.now()
+    date = now.strftime('%Y-%m-%d')
+    old_date = (now - timedelta(days=7)).strftime('%Y-%m-%d')
+    links_file = os.environ.get('LINKS_FILE')
+    if not links_file:
+        links_file = f"reports/{links_prefix}-{old_date}.csv"
+    os.makedirs('reports', exist_ok=True)
+    
+    # Initialize URL checker
+    checker = URLChecker(
+        max_retries=3,
+        timeout_seconds=15,
+        max_concurrent=50,
+        retry_delay=1,
+        cache_file=os.environ.get('LINK_CACHE_FILE'),
+        headers=headers
+    )
+
+    # Open report files and create CSV writers
+    extension = 'csv.gz' if GZIP_REPORTS else 'csv'
+    report_file = f"reports/{report_prefix}-report-{date}.{extension}"
+    report_404_file = f"reports/{report_prefix}-404-report-{date}.{extension}"
+    
+    with open_report(report_file) as main_csvfile, open_report(report_404_file) as file_404_csvfile:
+        
+        writers = {
+            'main': csv.writer(main_csvfile),
+            '404': csv.writer(file_404_csvfile)
+        }
+        
+        # Write headers
+        for writer in writers.values():
+            writer.writerow(['URL', 'Status Code', 'Content-Type', 'Parent URL', 'Input Line'])
+
+        broken_links = []
+        total_links = 0
+
+        # Keep one HTTP session open for the whole run
+        async with checker:
+            with open(links_file, 'r', newline='', encoding='utf-8') as csvfile:
+                reader = csv.reader(csvfile)
+                next(reader)  # Skip header row
+
+                # Stream rows to the checker, numbered as lines of the input file,
+                # writing results in one call per file as soon as they arrive
+                async for results in checker.check_rows(enumerate(reader, start=2)):
+                    writers['main'].writerows(result.as_row() for result in results)
+                    writers['404'].writerows(result.as_row() for result in results if result.status == 404)
+                    broken_links.extend((result.url, result.line_number) for result in results if result.status != 200)
+                    # Report progress each time another 1000 URLs are done
+                    if (total_links + len(results)) // 1000 > total_links // 1000:
+                        print(f"\nProcessed {total_links + len(results)} URLs")
+                    total_links += len(results)
+
+        print(f"\nAll links checked: Processed {total_links} URLs")
+
+    # Output results
+    print(f"\nREPORT_FILE={report_file}")
+    print(f"REPORT_404_FILE={report_404_file}")
+
+    if broken_links:
+        print("\nBroken links found in lines:")
+        for url, line_num in broken_links:
+            print(f"Line {line_num}: {url}")
+    
+    message = "Broken links detected." if broken_links else "No broken links found."
+
+    # Set environment variables and outputs for GitHub Actions, one write per file
+    env_payload = (
+        f"REPORT_FILE={report_file}\n"
+        f"REPORT_404_FILE={report_404_file}\n"
+        f"STATUS_MESSAGE={message}\n"
+    )
+    with open(GITHUB_ENV_FILE, 'a') as env_file:
+        env_file.write(env_payload)
+
+    with open(GITHUB_OUTPUT_FILE, 'a') as f:
+        f.write(f"broken_links_found={'true' if broken_links else 'false'}\n")
+
+def run(coro) -> None:
+    """
+    Run the coroutine on uvloop when it is installed, otherwise on asyncio
+    """
+    if uvloop:
+        uvloop.run(coro)
+    else:
+        asyncio.run(coro)